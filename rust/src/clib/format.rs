@@ -6,7 +6,7 @@ use libc::{c_char, c_int};
 
 use crate::{
     state::{c_str_to_net_state, is_state_in_json},
-    NMSTATE_FAIL, NMSTATE_PASS,
+    NMSTATE_FAIL, NMSTATE_FLAG_YAML_OUTPUT, NMSTATE_PASS,
 };
 
 #[allow(clippy::not_unsafe_ptr_arg_deref)]
@@ -16,6 +16,36 @@ pub extern "C" fn nmstate_net_state_format(
     formated_state: *mut *mut c_char,
     err_kind: *mut *mut c_char,
     err_msg: *mut *mut c_char,
+) -> c_int {
+    net_state_format(state, None, formated_state, err_kind, err_msg)
+}
+
+#[allow(clippy::not_unsafe_ptr_arg_deref)]
+#[no_mangle]
+pub extern "C" fn nmstate_net_state_format_with_flags(
+    flags: u32,
+    state: *const c_char,
+    formated_state: *mut *mut c_char,
+    err_kind: *mut *mut c_char,
+    err_msg: *mut *mut c_char,
+) -> c_int {
+    let output_yaml = (flags & NMSTATE_FLAG_YAML_OUTPUT) > 0;
+    net_state_format(
+        state,
+        Some(output_yaml),
+        formated_state,
+        err_kind,
+        err_msg,
+    )
+}
+
+fn net_state_format(
+    state: *const c_char,
+    // None means using the same format as input state
+    output_yaml: Option<bool>,
+    formated_state: *mut *mut c_char,
+    err_kind: *mut *mut c_char,
+    err_msg: *mut *mut c_char,
 ) -> c_int {
     assert!(!state.is_null());
     assert!(!formated_state.is_null());
@@ -32,6 +62,8 @@ pub extern "C" fn nmstate_net_state_format(
         return NMSTATE_PASS;
     }
 
+    let output_yaml = output_yaml.unwrap_or_else(|| !is_state_in_json(state));
+
     let net_state = match c_str_to_net_state(state, err_kind, err_msg) {
         Ok(s) => s,
         Err(rc) => {
@@ -39,20 +71,18 @@ pub extern "C" fn nmstate_net_state_format(
         }
     };
 
-    let input_is_json = is_state_in_json(state);
-
-    let serialize = if input_is_json {
-        serde_json::to_string(&net_state).map_err(|e| {
+    let serialize = if output_yaml {
+        serde_yaml::to_string(&net_state).map_err(|e| {
             nmstate::NmstateError::new(
                 nmstate::ErrorKind::Bug,
-                format!("Failed to convert state {net_state:?} to JSON: {e}"),
+                format!("Failed to convert state {net_state:?} to YAML: {e}"),
             )
         })
     } else {
-        serde_yaml::to_string(&net_state).map_err(|e| {
+        serde_json::to_string(&net_state).map_err(|e| {
             nmstate::NmstateError::new(
                 nmstate::ErrorKind::Bug,
-                format!("Failed to convert state {net_state:?} to YAML: {e}"),
+                format!("Failed to convert state {net_state:?} to JSON: {e}"),
             )
         })
     };
@@ -35,12 +35,18 @@ pub use crate::gen_conf::nmstate_generate_configurations;
 #[cfg(feature = "query_apply")]
 pub use crate::policy::nmstate_net_state_from_policy;
 #[cfg(feature = "query_apply")]
-pub use crate::query::nmstate_net_state_retrieve;
+pub use crate::query::{
+    nmstate_net_state_retrieve, nmstate_net_state_retrieve_with_len,
+};
 
 pub(crate) const NMSTATE_PASS: c_int = 0;
 pub(crate) const NMSTATE_FAIL: c_int = 1;
 
-pub use crate::format::nmstate_net_state_format;
+pub(crate) const NMSTATE_FLAG_YAML_OUTPUT: u32 = 1 << 8;
+
+pub use crate::format::{
+    nmstate_net_state_format, nmstate_net_state_format_with_flags,
+};
 
 static INSTANCE: OnceCell<MemoryLogger> = OnceCell::new();
 
@@ -54,6 +60,19 @@ pub extern "C" fn nmstate_cstring_free(cstring: *mut c_char) {
     }
 }
 
+#[no_mangle]
+pub extern "C" fn nmstate_cstring_free4(
+    cstring1: *mut c_char,
+    cstring2: *mut c_char,
+    cstring3: *mut c_char,
+    cstring4: *mut c_char,
+) {
+    nmstate_cstring_free(cstring1);
+    nmstate_cstring_free(cstring2);
+    nmstate_cstring_free(cstring3);
+    nmstate_cstring_free(cstring4);
+}
+
 pub(crate) fn init_logger() -> Result<&'static MemoryLogger, NmstateError> {
     match INSTANCE.get() {
         Some(l) => {
@@ -5,7 +5,9 @@ use std::time::SystemTime;
 
 use libc::{c_char, c_int};
 
-use crate::{init_logger, NMSTATE_FAIL, NMSTATE_PASS};
+use crate::{
+    init_logger, NMSTATE_FAIL, NMSTATE_FLAG_YAML_OUTPUT, NMSTATE_PASS,
+};
 
 pub(crate) const NMSTATE_FLAG_KERNEL_ONLY: u32 = 1 << 1;
 pub(crate) const NMSTATE_FLAG_NO_VERIFY: u32 = 1 << 2;
@@ -14,7 +16,6 @@ pub(crate) const NMSTATE_FLAG_INCLUDE_SECRETS: u32 = 1 << 4;
 pub(crate) const NMSTATE_FLAG_NO_COMMIT: u32 = 1 << 5;
 pub(crate) const NMSTATE_FLAG_MEMORY_ONLY: u32 = 1 << 6;
 pub(crate) const NMSTATE_FLAG_RUNNING_CONFIG_ONLY: u32 = 1 << 7;
-pub(crate) const NMSTATE_FLAG_YAML_OUTPUT: u32 = 1 << 8;
 
 #[allow(clippy::not_unsafe_ptr_arg_deref)]
 #[no_mangle]
@@ -24,6 +25,26 @@ pub extern "C" fn nmstate_net_state_retrieve(
     log: *mut *mut c_char,
     err_kind: *mut *mut c_char,
     err_msg: *mut *mut c_char,
+) -> c_int {
+    nmstate_net_state_retrieve_with_len(
+        flags,
+        state,
+        std::ptr::null_mut(),
+        log,
+        err_kind,
+        err_msg,
+    )
+}
+
+#[allow(clippy::not_unsafe_ptr_arg_deref)]
+#[no_mangle]
+pub extern "C" fn nmstate_net_state_retrieve_with_len(
+    flags: u32,
+    state: *mut *mut c_char,
+    state_len: *mut usize,
+    log: *mut *mut c_char,
+    err_kind: *mut *mut c_char,
+    err_msg: *mut *mut c_char,
 ) -> c_int {
     assert!(!state.is_null());
     assert!(!log.is_null());
@@ -35,6 +56,9 @@ pub extern "C" fn nmstate_net_state_retrieve(
         *state = std::ptr::null_mut();
         *err_kind = std::ptr::null_mut();
         *err_msg = std::ptr::null_mut();
+        if !state_len.is_null() {
+            *state_len = 0;
+        }
     }
 
     let logger = match init_logger() {
@@ -92,6 +116,9 @@ pub extern "C" fn nmstate_net_state_retrieve(
 
             match serialize {
                 Ok(state_str) => unsafe {
+                    if !state_len.is_null() {
+                        *state_len = state_str.len();
+                    }
                     *state = CString::new(state_str).unwrap().into_raw();
                     NMSTATE_PASS
                 },
@@ -0,0 +1,41 @@
+// SPDX-License-Identifier: Apache-2.0
+
+#include <assert.h>
+#include <stddef.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+#include <nmstate.h>
+
+int main(void) {
+	const char *state = "---\n"
+		"interfaces:\n"
+		"  - type: ethernet\n"
+		"    name: eth1\n";
+	char *formated_state = NULL;
+	char *err_kind = NULL;
+	char *err_msg = NULL;
+
+	// Pass: only formated_state is set, NULL pointers are ignored.
+	assert(nmstate_net_state_format(state,
+					&formated_state,
+					&err_kind,
+					&err_msg) == NMSTATE_PASS);
+	printf("%s\n", formated_state);
+	nmstate_cstring_free4(formated_state, err_kind, err_msg, NULL);
+
+	formated_state = NULL;
+	err_kind = NULL;
+	err_msg = NULL;
+
+	// Fail: err_kind and err_msg are set by invalid state.
+	assert(nmstate_net_state_format("{",
+					&formated_state,
+					&err_kind,
+					&err_msg) != NMSTATE_PASS);
+	printf("%s: %s\n", err_kind, err_msg);
+	nmstate_cstring_free4(formated_state, err_kind, err_msg, NULL);
+
+	exit(EXIT_SUCCESS);
+}
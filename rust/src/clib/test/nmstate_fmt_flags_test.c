@@ -0,0 +1,57 @@
+// SPDX-License-Identifier: Apache-2.0
+
+#include <assert.h>
+#include <stddef.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include <nmstate.h>
+
+static int format_state(uint32_t flags, const char *state,
+			char **formated_state) {
+	char *err_kind = NULL;
+	char *err_msg = NULL;
+	int rc = EXIT_SUCCESS;
+
+	if (nmstate_net_state_format_with_flags(flags,
+						state,
+						formated_state,
+						&err_kind,
+						&err_msg) == NMSTATE_PASS) {
+		printf("%s\n", *formated_state);
+	} else {
+		printf("%s: %s\n", err_kind, err_msg);
+		rc = EXIT_FAILURE;
+	}
+
+	nmstate_cstring_free(err_kind);
+	nmstate_cstring_free(err_msg);
+	return rc;
+}
+
+int main(void) {
+	int rc = EXIT_SUCCESS;
+	const char *state = "{\"interfaces\": "
+		"[{\"name\": \"eth1\", \"type\": \"ethernet\"}]}";
+	char *formated_state = NULL;
+
+	rc = format_state(NMSTATE_FLAG_YAML_OUTPUT, state, &formated_state);
+	if (rc == EXIT_SUCCESS) {
+		assert(formated_state[0] != '{');
+		assert(strstr(formated_state, "- name: eth1") != NULL);
+	}
+	nmstate_cstring_free(formated_state);
+	formated_state = NULL;
+	if (rc != EXIT_SUCCESS)
+		exit(rc);
+
+	rc = format_state(NMSTATE_FLAG_NONE, state, &formated_state);
+	if (rc == EXIT_SUCCESS) {
+		assert(formated_state[0] == '{');
+		assert(strstr(formated_state, "\"name\":\"eth1\"") != NULL);
+	}
+	nmstate_cstring_free(formated_state);
+	exit(rc);
+}
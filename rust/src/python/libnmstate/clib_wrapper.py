@@ -1,9 +1,18 @@
 # SPDX-License-Identifier: Apache-2.0
 
-from ctypes import c_int, c_char_p, c_uint32, POINTER, byref, cdll
+from ctypes import (
+    c_int,
+    c_char_p,
+    c_size_t,
+    c_uint32,
+    POINTER,
+    byref,
+    cdll,
+    string_at,
+)
 import json
 import logging
-import yaml
+import threading
 
 from .error import (
     NmstateDependencyError,
@@ -18,11 +27,115 @@ from .error import (
     NmstateVerificationError,
 )
 
+
+def _json_encode_std(obj):
+    return json.dumps(obj).encode("utf-8")
+
+
+# orjson is an optional accelerator for encoding the states passed to
+# libnmstate. States orjson cannot encode, like integers wider than 64 bits,
+# are encoded by json.dumps() instead, so libnmstate reports the same error as
+# without orjson. orjson encodes float NaN/Infinity as null, which libnmstate
+# could take as unset rather than rejecting it, hence the desired state of
+# apply_net_state() is never encoded by orjson.
+try:
+    import orjson
+
+    def _json_encode(obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return _json_encode_std(obj)
+
+    _json_loads = orjson.loads
+
+except ImportError:
+    _json_encode = _json_encode_std
+    _json_loads = json.loads
+
+
+def _json_dumps(obj, use_orjson=True):
+    # Every state or policy taken by the public API (apply(),
+    # generate_configurations(), generate_differences(),
+    # gen_net_state_from_policy() and PrettyState) could also be JSON string
+    # encoded as bytes, for example the same current state serialized once
+    # and used for many calls. It is passed to libnmstate as is.
+    if isinstance(obj, bytes):
+        return obj
+    if use_orjson:
+        return _json_encode(obj)
+    return _json_encode_std(obj)
+
+
 lib = cdll.LoadLibrary("libnmstate.so.2")
 
-lib.nmstate_net_state_retrieve.restype = c_int
-lib.nmstate_net_state_retrieve.argtypes = (
+lib.nmstate_net_state_retrieve_with_len.restype = c_int
+lib.nmstate_net_state_retrieve_with_len.argtypes = (
+    c_uint32,
+    POINTER(c_char_p),
+    POINTER(c_size_t),
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+)
+
+lib.nmstate_net_state_apply.restype = c_int
+lib.nmstate_net_state_apply.argtypes = (
+    c_uint32,
+    c_char_p,
+    c_uint32,
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+)
+
+lib.nmstate_checkpoint_commit.restype = c_int
+lib.nmstate_checkpoint_commit.argtypes = (
+    c_char_p,
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+)
+
+lib.nmstate_checkpoint_rollback.restype = c_int
+lib.nmstate_checkpoint_rollback.argtypes = (
+    c_char_p,
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+)
+
+lib.nmstate_generate_configurations.restype = c_int
+lib.nmstate_generate_configurations.argtypes = (
+    c_char_p,
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+)
+
+lib.nmstate_generate_differences.restype = c_int
+lib.nmstate_generate_differences.argtypes = (
+    c_char_p,
+    c_char_p,
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+)
+
+lib.nmstate_net_state_format_with_flags.restype = c_int
+lib.nmstate_net_state_format_with_flags.argtypes = (
     c_uint32,
+    c_char_p,
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+    POINTER(c_char_p),
+)
+
+lib.nmstate_net_state_from_policy.restype = c_int
+lib.nmstate_net_state_from_policy.argtypes = (
+    c_char_p,
+    c_char_p,
     POINTER(c_char_p),
     POINTER(c_char_p),
     POINTER(c_char_p),
@@ -32,6 +145,19 @@ lib.nmstate_net_state_retrieve.argtypes = (
 lib.nmstate_cstring_free.restype = None
 lib.nmstate_cstring_free.argtypes = (c_char_p,)
 
+lib.nmstate_cstring_free4.restype = None
+lib.nmstate_cstring_free4.argtypes = (c_char_p, c_char_p, c_char_p, c_char_p)
+
+_net_state_retrieve_with_len = lib.nmstate_net_state_retrieve_with_len
+_net_state_apply = lib.nmstate_net_state_apply
+_checkpoint_commit = lib.nmstate_checkpoint_commit
+_checkpoint_rollback = lib.nmstate_checkpoint_rollback
+_generate_configurations = lib.nmstate_generate_configurations
+_generate_differences = lib.nmstate_generate_differences
+_net_state_format_with_flags = lib.nmstate_net_state_format_with_flags
+_net_state_from_policy = lib.nmstate_net_state_from_policy
+_cstring_free4 = lib.nmstate_cstring_free4
+
 NMSTATE_FLAG_NONE = 0
 NMSTATE_FLAG_KERNEL_ONLY = 1 << 1
 NMSTATE_FLAG_NO_VERIFY = 1 << 2
@@ -40,8 +166,82 @@ NMSTATE_FLAG_INCLUDE_SECRETS = 1 << 4
 NMSTATE_FLAG_NO_COMMIT = 1 << 5
 NMSTATE_FLAG_MEMORY_ONLY = 1 << 6
 NMSTATE_FLAG_RUNNING_CONFIG_ONLY = 1 << 7
+NMSTATE_FLAG_YAML_OUTPUT = 1 << 8
 NMSTATE_PASS = 0
 
+ERROR_KIND_MAP = {
+    "VerificationError": NmstateVerificationError,
+    "InvalidArgument": NmstateValueError,
+    "Bug": NmstateInternalError,
+    "PluginFailure": NmstatePluginError,
+    "NotImplementedError": NmstateNotImplementedError,
+    "KernelIntegerRoundedError": NmstateKernelIntegerRoundedError,
+    "NotSupportedError": NmstateNotSupportedError,
+    "DependencyError": NmstateDependencyError,
+    "PermissionError": NmstatePermissionError,
+}
+
+LOG_LEVEL_MAP = {
+    "ERROR": logging.ERROR,
+    "WARN": logging.WARNING,
+    "INFO": logging.INFO,
+}
+
+
+class _OutParams(threading.local):
+    """
+    Per-thread `char **` output parameters shared by all libnmstate calls,
+    saving the creation of new ctypes objects on every call.
+    """
+
+    def __init__(self):
+        self.c_output = c_char_p()
+        self.c_output_len = c_size_t()
+        self.c_log = c_char_p()
+        self.c_err_kind = c_char_p()
+        self.c_err_msg = c_char_p()
+        self.output = byref(self.c_output)
+        self.output_len = byref(self.c_output_len)
+        self.log = byref(self.c_log)
+        self.err_kind = byref(self.c_err_kind)
+        self.err_msg = byref(self.c_err_msg)
+
+    def take(self, rc):
+        """
+        Copy the output strings into bytes, free them and reset the output
+        parameters to NULL, so that parameters not used by the next call
+        never hold a dangling pointer.
+        The error kind and message are only read when `rc` is a failure.
+        When the call provided the output length, the output is copied
+        without scanning for its terminating NUL.
+        """
+        output_len = self.c_output_len.value
+        if output_len:
+            output = string_at(self.c_output, output_len)
+        else:
+            output = self.c_output.value
+        if rc == NMSTATE_PASS:
+            values = (output, self.c_log.value, None, None)
+        else:
+            values = (
+                output,
+                self.c_log.value,
+                self.c_err_kind.value,
+                self.c_err_msg.value,
+            )
+        _cstring_free4(
+            self.c_output, self.c_log, self.c_err_kind, self.c_err_msg
+        )
+        self.c_output.value = None
+        self.c_output_len.value = 0
+        self.c_log.value = None
+        self.c_err_kind.value = None
+        self.c_err_msg.value = None
+        return values
+
+
+_out_params = _OutParams()
+
 
 def retrieve_net_state_json(
     kernel_only=False,
@@ -49,10 +249,20 @@ def retrieve_net_state_json(
     include_secrets=False,
     running_config_only=False,
 ):
-    c_err_msg = c_char_p()
-    c_err_kind = c_char_p()
-    c_state = c_char_p()
-    c_log = c_char_p()
+    return retrieve_net_state_bytes(
+        kernel_only=kernel_only,
+        include_status_data=include_status_data,
+        include_secrets=include_secrets,
+        running_config_only=running_config_only,
+    ).decode("utf-8")
+
+
+def retrieve_net_state_bytes(
+    kernel_only=False,
+    include_status_data=False,
+    include_secrets=False,
+    running_config_only=False,
+):
     flags = NMSTATE_FLAG_NONE
     if kernel_only:
         flags |= NMSTATE_FLAG_KERNEL_ONLY
@@ -63,26 +273,20 @@ def retrieve_net_state_json(
     if running_config_only:
         flags |= NMSTATE_FLAG_RUNNING_CONFIG_ONLY
 
-    rc = lib.nmstate_net_state_retrieve(
+    out = _out_params
+    rc = _net_state_retrieve_with_len(
         flags,
-        byref(c_state),
-        byref(c_log),
-        byref(c_err_kind),
-        byref(c_err_msg),
+        out.output,
+        out.output_len,
+        out.log,
+        out.err_kind,
+        out.err_msg,
     )
-    state = c_state.value
-    err_msg = c_err_msg.value
-    err_kind = c_err_kind.value
-    parse_log(c_log.value)
-    lib.nmstate_cstring_free(c_log)
-    lib.nmstate_cstring_free(c_state)
-    lib.nmstate_cstring_free(c_err_kind)
-    lib.nmstate_cstring_free(c_err_msg)
+    state, log, err_kind, err_msg = out.take(rc)
+    parse_log(log)
     if rc != NMSTATE_PASS:
         raise NmstateError(f"{err_kind}: {err_msg}")
-    # pylint: disable=no-member
-    return state.decode("utf-8")
-    # pylint: enable=no-member
+    return state
 
 
 def apply_net_state(
@@ -93,10 +297,6 @@ def apply_net_state(
     commit=True,
     rollback_timeout=60,
 ):
-    c_err_msg = c_char_p()
-    c_err_kind = c_char_p()
-    c_state = c_char_p(json.dumps(state).encode("utf-8"))
-    c_log = c_char_p()
     flags = NMSTATE_FLAG_NONE
     if kernel_only:
         flags |= NMSTATE_FLAG_KERNEL_ONLY
@@ -110,90 +310,60 @@ def apply_net_state(
     if not save_to_disk:
         flags |= NMSTATE_FLAG_MEMORY_ONLY
 
-    rc = lib.nmstate_net_state_apply(
+    out = _out_params
+    rc = _net_state_apply(
         flags,
-        c_state,
+        _json_dumps(state, use_orjson=False),
         rollback_timeout,
-        byref(c_log),
-        byref(c_err_kind),
-        byref(c_err_msg),
+        out.log,
+        out.err_kind,
+        out.err_msg,
     )
-    err_msg = c_err_msg.value
-    err_kind = c_err_kind.value
-    parse_log(c_log.value)
-    lib.nmstate_cstring_free(c_log)
-    lib.nmstate_cstring_free(c_err_kind)
-    lib.nmstate_cstring_free(c_err_msg)
+    _, log, err_kind, err_msg = out.take(rc)
+    parse_log(log)
     if rc != NMSTATE_PASS:
         raise map_error(err_kind, err_msg)
 
 
 def commit_checkpoint(checkpoint):
-    c_err_msg = c_char_p()
-    c_err_kind = c_char_p()
-    c_checkpoint = c_char_p(checkpoint)
-    c_log = c_char_p()
-
-    rc = lib.nmstate_checkpoint_commit(
-        c_checkpoint,
-        byref(c_log),
-        byref(c_err_kind),
-        byref(c_err_msg),
+    out = _out_params
+    rc = _checkpoint_commit(
+        checkpoint,
+        out.log,
+        out.err_kind,
+        out.err_msg,
     )
-
-    err_msg = c_err_msg.value
-    err_kind = c_err_kind.value
-    parse_log(c_log.value)
-    lib.nmstate_cstring_free(c_log)
-    lib.nmstate_cstring_free(c_err_kind)
-    lib.nmstate_cstring_free(c_err_msg)
+    _, log, err_kind, err_msg = out.take(rc)
+    parse_log(log)
     if rc != NMSTATE_PASS:
         raise map_error(err_kind, err_msg)
 
 
 def rollback_checkpoint(checkpoint):
-    c_err_msg = c_char_p()
-    c_err_kind = c_char_p()
-    c_checkpoint = c_char_p(checkpoint)
-    c_log = c_char_p()
-
-    rc = lib.nmstate_checkpoint_rollback(
-        c_checkpoint,
-        byref(c_log),
-        byref(c_err_kind),
-        byref(c_err_msg),
+    out = _out_params
+    rc = _checkpoint_rollback(
+        checkpoint,
+        out.log,
+        out.err_kind,
+        out.err_msg,
     )
-
-    err_msg = c_err_msg.value
-    err_kind = c_err_kind.value
-    parse_log(c_log.value)
-    lib.nmstate_cstring_free(c_log)
-    lib.nmstate_cstring_free(c_err_kind)
-    lib.nmstate_cstring_free(c_err_msg)
+    _, log, err_kind, err_msg = out.take(rc)
+    parse_log(log)
     if rc != NMSTATE_PASS:
         raise map_error(err_kind, err_msg)
 
 
 def gen_conf(state):
-    c_err_msg = c_char_p()
-    c_err_kind = c_char_p()
-    c_state = c_char_p(json.dumps(state).encode("utf-8"))
-    c_configs = c_char_p()
-    c_log = c_char_p()
-    rc = lib.nmstate_generate_configurations(
-        c_state,
-        byref(c_configs),
-        byref(c_log),
-        byref(c_err_kind),
-        byref(c_err_msg),
+    out = _out_params
+    rc = _generate_configurations(
+        _json_dumps(state),
+        out.output,
+        out.log,
+        out.err_kind,
+        out.err_msg,
     )
-    configs = c_configs.value
-    err_msg = c_err_msg.value
-    err_kind = c_err_kind.value
-    parse_log(c_log.value)
-    lib.nmstate_cstring_free(c_log)
-    lib.nmstate_cstring_free(c_err_kind)
-    lib.nmstate_cstring_free(c_err_msg)
+    configs, log, err_kind, err_msg = out.take(rc)
+    parse_log(log)
     if rc != NMSTATE_PASS:
         raise map_error(err_kind, err_msg)
     # pylint: disable=no-member
@@ -202,23 +372,15 @@ def gen_conf(state):
 
 
 def gen_diff(new_state, old_state):
-    c_err_msg = c_char_p()
-    c_err_kind = c_char_p()
-    c_new_state = c_char_p(json.dumps(new_state).encode("utf-8"))
-    c_old_state = c_char_p(json.dumps(old_state).encode("utf-8"))
-    c_diff_state = c_char_p()
-    rc = lib.nmstate_generate_differences(
-        c_new_state,
-        c_old_state,
-        byref(c_diff_state),
-        byref(c_err_kind),
-        byref(c_err_msg),
+    out = _out_params
+    rc = _generate_differences(
+        _json_dumps(new_state),
+        _json_dumps(old_state),
+        out.output,
+        out.err_kind,
+        out.err_msg,
     )
-    diff_state = c_diff_state.value
-    err_msg = c_err_msg.value
-    err_kind = c_err_kind.value
-    lib.nmstate_cstring_free(c_err_kind)
-    lib.nmstate_cstring_free(c_err_msg)
+    diff_state, _, err_kind, err_msg = out.take(rc)
     if rc != NMSTATE_PASS:
         raise map_error(err_kind, err_msg)
     # pylint: disable=no-member
@@ -227,24 +389,19 @@ def gen_diff(new_state, old_state):
 
 
 def net_state_serialize(state, use_yaml=True):
-    c_err_msg = c_char_p()
-    c_err_kind = c_char_p()
+    flags = NMSTATE_FLAG_NONE
     if use_yaml:
-        c_state = c_char_p(yaml.dump(state).encode("utf-8"))
-    else:
-        c_state = c_char_p(json.dumps(state).encode("utf-8"))
-    c_formated_state = c_char_p()
-    rc = lib.nmstate_net_state_format(
-        c_state,
-        byref(c_formated_state),
-        byref(c_err_kind),
-        byref(c_err_msg),
+        flags |= NMSTATE_FLAG_YAML_OUTPUT
+
+    out = _out_params
+    rc = _net_state_format_with_flags(
+        flags,
+        _json_dumps(state),
+        out.output,
+        out.err_kind,
+        out.err_msg,
     )
-    formated_state = c_formated_state.value
-    err_msg = c_err_msg.value
-    err_kind = c_err_kind.value
-    lib.nmstate_cstring_free(c_err_kind)
-    lib.nmstate_cstring_free(c_err_msg)
+    formated_state, _, err_kind, err_msg = out.take(rc)
     if rc != NMSTATE_PASS:
         raise map_error(err_kind, err_msg)
     # pylint: disable=no-member
@@ -253,27 +410,17 @@ def net_state_serialize(state, use_yaml=True):
 
 
 def net_state_from_policy(policy, cur_state):
-    c_err_msg = c_char_p()
-    c_err_kind = c_char_p()
-    c_policy = c_char_p(json.dumps(policy).encode("utf-8"))
-    c_cur_state = c_char_p(json.dumps(cur_state).encode("utf-8"))
-    c_state = c_char_p()
-    c_log = c_char_p()
-    rc = lib.nmstate_net_state_from_policy(
-        c_policy,
-        c_cur_state,
-        byref(c_state),
-        byref(c_log),
-        byref(c_err_kind),
-        byref(c_err_msg),
+    out = _out_params
+    rc = _net_state_from_policy(
+        _json_dumps(policy),
+        _json_dumps(cur_state),
+        out.output,
+        out.log,
+        out.err_kind,
+        out.err_msg,
     )
-    state = c_state.value
-    err_msg = c_err_msg.value
-    err_kind = c_err_kind.value
-    parse_log(c_log.value)
-    lib.nmstate_cstring_free(c_log)
-    lib.nmstate_cstring_free(c_err_kind)
-    lib.nmstate_cstring_free(c_err_msg)
+    state, log, err_kind, err_msg = out.take(rc)
+    parse_log(log)
     if rc != NMSTATE_PASS:
         raise map_error(err_kind, err_msg)
     # pylint: disable=no-member
@@ -284,24 +431,9 @@ def net_state_from_policy(policy, cur_state):
 def map_error(err_kind, err_msg):
     err_msg = err_msg.decode("utf-8")
     err_kind = err_kind.decode("utf-8")
-    if err_kind == "VerificationError":
-        return NmstateVerificationError(err_msg)
-    elif err_kind == "InvalidArgument":
-        return NmstateValueError(err_msg)
-    elif err_kind == "Bug":
-        return NmstateInternalError(err_msg)
-    elif err_kind == "PluginFailure":
-        return NmstatePluginError(err_msg)
-    elif err_kind == "NotImplementedError":
-        return NmstateNotImplementedError(err_msg)
-    elif err_kind == "KernelIntegerRoundedError":
-        return NmstateKernelIntegerRoundedError(err_msg)
-    elif err_kind == "NotSupportedError":
-        return NmstateNotSupportedError(err_msg)
-    elif err_kind == "DependencyError":
-        return NmstateDependencyError(err_msg)
-    elif err_kind == "PermissionError":
-        return NmstatePermissionError(err_msg)
+    error_class = ERROR_KIND_MAP.get(err_kind)
+    if error_class:
+        return error_class(err_msg)
     else:
         return NmstateError(f"{err_kind}: {err_msg}")
 
@@ -310,20 +442,25 @@ def parse_log(logs):
     if logs is None:
         return
 
+    # Most callers run with INFO and DEBUG disabled, skip parsing the log
+    # entries when none of them could be emitted. Only the level values are
+    # matched, so this does not depend on how logger.rs serializes the
+    # entries. A message merely containing these words costs a full parse.
+    if (
+        not logging.getLogger().isEnabledFor(logging.INFO)
+        and b'"ERROR"' not in logs
+        and b'"WARN"' not in logs
+    ):
+        return
+
     log_entries = []
     try:
-        log_entries = json.loads(logs.decode("utf-8"))
+        log_entries = _json_loads(logs)
     except Exception:
         pass
     for log_entry in log_entries:
+        level = LOG_LEVEL_MAP.get(log_entry["level"], logging.DEBUG)
+        if not logging.getLogger().isEnabledFor(level):
+            continue
         msg = f"{log_entry['time']}:{log_entry['file']}: {log_entry['msg']}"
-        level = log_entry["level"]
-
-        if level == "ERROR":
-            logging.error(msg)
-        elif level == "WARN":
-            logging.warning(msg)
-        elif level == "INFO":
-            logging.info(msg)
-        else:
-            logging.debug(msg)
+        logging.log(level, msg)
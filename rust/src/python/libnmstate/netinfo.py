@@ -14,14 +14,14 @@
 
 import json
 
-from .clib_wrapper import retrieve_net_state_json
+from .clib_wrapper import retrieve_net_state_bytes
 
 
 def show(
     *, kernel_only=False, include_status_data=False, include_secrets=False
 ):
     return json.loads(
-        retrieve_net_state_json(
+        retrieve_net_state_bytes(
             kernel_only=kernel_only,
             include_status_data=include_status_data,
             include_secrets=include_secrets,
@@ -31,7 +31,7 @@ def show(
 
 def show_running_config(include_secrets=False):
     return json.loads(
-        retrieve_net_state_json(
+        retrieve_net_state_bytes(
             include_secrets=include_secrets,
             running_config_only=True,
         )
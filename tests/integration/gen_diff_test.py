@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: LGPL-2.1-or-later
 
+import json
+
 import libnmstate
 
 from .testlib.yaml import load_yaml
@@ -54,3 +56,32 @@ def test_gen_diff():
     assert (
         libnmstate.generate_differences(des_state, cur_state) == expected_state
     )
+
+
+def test_gen_diff_with_json_bytes():
+    des_state = load_yaml(
+        """---
+        interfaces:
+          - name: eth1
+            type: ethernet
+            state: up
+            ipv6:
+              enabled: false
+            """
+    )
+    cur_state = load_yaml(
+        """---
+        interfaces:
+          - name: eth1
+            type: ethernet
+            state: up
+            ipv6:
+              enabled: true
+              dhcp: true
+              autoconf: true"""
+    )
+
+    assert libnmstate.generate_differences(
+        json.dumps(des_state).encode("utf-8"),
+        json.dumps(cur_state).encode("utf-8"),
+    ) == libnmstate.generate_differences(des_state, cur_state)
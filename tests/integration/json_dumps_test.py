@@ -0,0 +1,68 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+import json
+
+import pytest
+
+from libnmstate import clib_wrapper
+from libnmstate.clib_wrapper import NMSTATE_PASS
+from libnmstate.clib_wrapper import _json_dumps
+
+from .testlib.yaml import load_yaml
+
+orjson = pytest.importorskip("orjson")
+
+
+@pytest.fixture
+def eth1_state():
+    return load_yaml(
+        """---
+        interfaces:
+          - name: eth1
+            type: ethernet
+            state: up
+            mtu: 1500
+            ipv4:
+              enabled: true
+              dhcp: false
+              address:
+                - ip: 192.0.2.1
+                  prefix-length: 24
+            ipv6:
+              enabled: false
+        routes:
+          config:
+            - destination: 198.51.100.0/24
+              next-hop-address: 192.0.2.2
+              next-hop-interface: eth1
+              metric: 150
+              table-id: 254
+        """
+    )
+
+
+def test_json_dumps_equal_to_json_module(eth1_state):
+    assert json.loads(_json_dumps(eth1_state)) == json.loads(
+        json.dumps(eth1_state)
+    )
+
+
+def test_json_dumps_big_int_encoded_by_json_module(eth1_state):
+    eth1_state["interfaces"][0]["mtu"] = 2**64
+
+    assert _json_dumps(eth1_state) == json.dumps(eth1_state).encode("utf-8")
+
+
+def test_apply_send_nan_to_libnmstate(eth1_state, monkeypatch):
+    sent_states = []
+
+    def fake_net_state_apply(flags, state, *args):
+        sent_states.append(state)
+        return NMSTATE_PASS
+
+    monkeypatch.setattr(clib_wrapper, "_net_state_apply", fake_net_state_apply)
+    eth1_state["interfaces"][0]["mtu"] = float("nan")
+
+    clib_wrapper.apply_net_state(eth1_state)
+
+    assert b'"mtu": NaN' in sent_states[0]
@@ -24,9 +24,22 @@ import time
 import pytest
 
 import libnmstate
+from libnmstate.schema import Interface
+from libnmstate.schema import InterfaceState
+from libnmstate.schema import InterfaceType
 
 from .testlib import ifacelib
 
+MEM_LEAK_TEST_IFACE_COUNT = 200
+MEM_LEAK_TEST_LOOP = 1000
+# Leaking the output would grow RSS by megabytes in MEM_LEAK_TEST_LOOP
+MEM_LEAK_TEST_MAX_RSS_GROWTH = 4 * 1024 * 1024
+
+
+def get_current_rss():
+    with open("/proc/self/statm") as fd:
+        return int(fd.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
 
 def get_current_open_fd():
     time.sleep(0.1)  # Wait sysfs/proc been updated.
@@ -58,3 +71,36 @@ def test_libnmstate_apply_fd_leak(disable_logging):
         with ifacelib.iface_up("eth1"):
             pass
     assert get_current_open_fd() <= original_fd
+
+
+@pytest.fixture
+def big_state():
+    return {
+        Interface.KEY: [
+            {
+                Interface.NAME: f"dummy{i}",
+                Interface.TYPE: InterfaceType.DUMMY,
+                Interface.STATE: InterfaceState.UP,
+            }
+            for i in range(0, MEM_LEAK_TEST_IFACE_COUNT)
+        ]
+    }
+
+
+@pytest.mark.tier1
+def test_libnmstate_pretty_state_mem_leak(disable_logging, big_state):
+    libnmstate.PrettyState(big_state).json
+    original_rss = get_current_rss()
+    for x in range(0, MEM_LEAK_TEST_LOOP):
+        libnmstate.PrettyState(big_state).json
+    assert get_current_rss() - original_rss < MEM_LEAK_TEST_MAX_RSS_GROWTH
+
+
+@pytest.mark.tier1
+def test_libnmstate_gen_diff_mem_leak(disable_logging, big_state):
+    old_state = {Interface.KEY: []}
+    libnmstate.generate_differences(big_state, old_state)
+    original_rss = get_current_rss()
+    for x in range(0, MEM_LEAK_TEST_LOOP):
+        libnmstate.generate_differences(big_state, old_state)
+    assert get_current_rss() - original_rss < MEM_LEAK_TEST_MAX_RSS_GROWTH
@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: LGPL-2.1-or-later
 
+import json
+
 import libnmstate
 
 from .testlib.yaml import load_yaml
@@ -33,3 +35,26 @@ def test_pretty_state_json():
     )
 
     assert '[{"name":"eth1"' in libnmstate.PrettyState(state).json
+
+
+def test_pretty_state_with_json_bytes():
+    state = load_yaml(
+        """---
+        interfaces:
+          - type: ethernet
+            name: eth1
+            ipv6:
+              enabled: false
+            state: up
+            """
+    )
+    state_bytes = json.dumps(state).encode("utf-8")
+
+    assert (
+        libnmstate.PrettyState(state_bytes).yaml
+        == libnmstate.PrettyState(state).yaml
+    )
+    assert (
+        libnmstate.PrettyState(state_bytes).json
+        == libnmstate.PrettyState(state).json
+    )
@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: LGPL-2.1-or-later
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
 import libnmstate
@@ -13,57 +14,87 @@ from libnmstate.schema import RouteRule
 from .cmdlib import exec_cmd
 
 NM_CONN_FOLDER = "/etc/NetworkManager/system-connections"
+SAVE_NMCONNECTION_WORKERS = 8
 
 
 @contextmanager
 def gen_conf_apply(desire_state):
+    ifaces_key = Interface.KEY
+    name_key = Interface.NAME
+    state_key = Interface.STATE
+    absent = InterfaceState.ABSENT
     iface_names = [
-        iface[Interface.NAME] for iface in desire_state.get(Interface.KEY, [])
+        iface[name_key] for iface in desire_state.get(ifaces_key, [])
     ]
     file_paths = []
     try:
         conns = libnmstate.generate_configurations(desire_state).get(
             "NetworkManager", []
         )
-        for conn in conns:
-            file_paths.append(save_nmconnection(conn[0], conn[1]))
+        file_paths = save_nmconnections(conns)
         reload_nm_connection()
         activate_all_nm_connections()
         yield
     finally:
         absent_state = {
             DNS.KEY: {DNS.CONFIG: {}},
-            Interface.KEY: [],
+            ifaces_key: [
+                {name_key: iface_name, state_key: absent}
+                for iface_name in iface_names
+            ],
             Route.KEY: {Route.CONFIG: [{Route.STATE: Route.STATE_ABSENT}]},
             RouteRule.KEY: {
                 RouteRule.CONFIG: [{RouteRule.STATE: RouteRule.STATE_ABSENT}]
             },
         }
-        for iface_name in iface_names:
-            absent_state[Interface.KEY].append(
-                {
-                    Interface.NAME: iface_name,
-                    Interface.STATE: InterfaceState.ABSENT,
-                }
-            )
         libnmstate.apply(absent_state)
-        for file_path in file_paths:
-            try:
-                os.unlink(file_path)
-            except Exception:
-                pass
+        remove_files(file_paths)
+
+
+def save_nmconnections(conns):
+    """
+    Save connections in parallel and return the written file paths. On
+    failure, the files already written are removed before the first error
+    is raised.
+    """
+    with ThreadPoolExecutor(max_workers=SAVE_NMCONNECTION_WORKERS) as pool:
+        futures = [
+            pool.submit(save_nmconnection, conn[0], conn[1]) for conn in conns
+        ]
+    file_paths = []
+    first_error = None
+    for future in futures:
+        try:
+            file_paths.append(future.result())
+        except Exception as e:
+            if first_error is None:
+                first_error = e
+    if first_error is not None:
+        remove_files(file_paths)
+        raise first_error
+    return file_paths
 
 
 def save_nmconnection(file_name, content):
     file_path = f"{NM_CONN_FOLDER}/{file_name}"
-    with open(file_path, "w") as fd:
+    with os.fdopen(
+        os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w"
+    ) as fd:
+        # O_CREAT mode does not apply to existing file, NetworkManager
+        # refuses keyfile with insecure permissions.
+        os.fchmod(fd.fileno(), 0o600)
         fd.write(content)
-
-    os.chmod(file_path, 0o600)
-    os.chown(file_path, 0, 0)
     return file_path
 
 
+def remove_files(file_paths):
+    for file_path in file_paths:
+        try:
+            os.unlink(file_path)
+        except Exception:
+            pass
+
+
 def reload_nm_connection():
     exec_cmd("nmcli c reload".split(), check=True)
 